@@ -1,32 +1,47 @@
 from __future__ import annotations
+import sys
 from collections.abc import Iterable
 from typing import Optional, Callable, Any
 from dataclasses import dataclass, field
-from .parsing import deliminate_text_args, extract_positionals_and_kwargs, parse_arguments
-from .command import Command
+from weakref import WeakKeyDictionary, ref
+from .parsing import parse_line, extract_positionals_and_kwargs
+from .command import Command, _resolve_refs
 from .errors import CLIError, CommandNotFoundError, EmptyEntryError
 
 
+# Registry of what CLIs a function is part of, weakly keyed so entries die with the
+# function; values hold weakrefs so they do not keep their own key alive
+_CLI_REGISTRY: WeakKeyDictionary[Callable, list[ref[CLI]]] = WeakKeyDictionary()
+
+# Registry of which CLI is currently invoking a function
+_INVOKER_REGISTRY: WeakKeyDictionary[Callable, ref[CLI]] = WeakKeyDictionary()
+
+
 class CLI:
     '''Command-Line Interface'''
 
-    # Attribute applied to function to know what CLIs its part of
-    CLI_ATTR = '__cli__'
-
-    # Attribute applied to fuction to know which CLI invoked it
-    INVOKER_ATTR = '__invoker__'
+    __slots__ = ('title', 'entry_marker', 'arg_parsers', '_commands', 'ignore_case',
+                 '_keep_running', 'env_vars', '_invoking_func', '_invoking', '_match_index',
+                 '_case_fold', '__weakref__')
 
     def __init__(self, title: str, entry_marker: Optional[str] = None, arg_parsers: Optional[dict[type, Callable]] = None, commands: Optional[list[Command]] = None, ignore_case: Optional[bool] = False, env_vars: Optional[dict[str, Any]] = None) -> None:
         self.title: str = title
         self.entry_marker: str = '>' if entry_marker is None else entry_marker
         self.arg_parsers: dict[type, Callable] = {} \
             if arg_parsers is None else arg_parsers
-        self._commands: list[Command] = [] if commands is None else commands
+        self._commands: list[Command] = []
         self.ignore_case = ignore_case
+        # Specialized once here; ignore_case is effectively fixed after construction
+        # since the match index keys are also built with it
+        self._case_fold: Callable[[str], str] = str.lower if ignore_case else str
         self._keep_running: bool = False
         self.env_vars = {} if env_vars is None else env_vars
         self._invoking_func = None
         self._invoking = None
+        self._match_index: dict[str, Command] = {}
+        if commands is not None:
+            for command in commands:
+                self.add_command(command)
 
     def commands(self) -> list[Command]:
         '''Get all commands'''
@@ -37,24 +52,32 @@ class CLI:
         '''Adds command this CLI, `func_or_cmd` can be a function or Command'''
 
         def set_cli(func):
-            if not hasattr(func, CLI.CLI_ATTR):
-                setattr(func, CLI.CLI_ATTR, [self])
-            else:
-                func.__cli__.append(self)
-            if not hasattr(func, CLI.INVOKER_ATTR):
-                setattr(func, CLI.INVOKER_ATTR, None)
+            _CLI_REGISTRY.setdefault(func, []).append(ref(self))
 
         if isinstance(func_or_cmd, Command):
             if not all(arg is None for arg in [matches, detail, verb, options]):
                 raise RuntimeError(
                     f'{self.add_command.__name__}(...), when {func_or_cmd} is of type {Command.__name__}, all other args must be None')
-            self._commands.append(func_or_cmd)
-            set_cli(func_or_cmd.function)
+            command = func_or_cmd
+            set_cli(command.function)
         else:
             options = dict() if options is None else options
             set_cli(func_or_cmd)
-            self._commands.append(
-                Command(func_or_cmd, matches, detail, verb, options))
+            command = Command(func_or_cmd, matches, detail, verb, options)
+        self._index_command(command)
+        self._commands.append(command)
+
+    def _index_command(self, command: Command) -> None:
+        '''Index `command.matches` for O(1) lookup in match_command()'''
+
+        keys: tuple[str] = command.matches_lower() if self.ignore_case else command.matches
+        # Validate every key before inserting any, so a duplicate leaves the index unchanged
+        for match, key in zip(command.matches, keys):
+            if key in self._match_index:
+                raise RuntimeError(
+                    f'{match} matched two commands -> {self._match_index[key]} and {command}')
+        for key in keys:
+            self._match_index[key] = command
 
     def command(self, matches: Optional[tuple[str]] = None, detail: Optional[str] = None, verb: Optional[Verb] = None, options: Optional[dict[str, Any]] = None) -> Callable[[Callable], Callable]:
         '''Add decorated function to this CLI'''
@@ -65,84 +88,65 @@ class CLI:
         return decorator
 
     def match_command(self, command_name: str) -> Command | None:
-        matches: Iterable[Command] = filter(
-            lambda cmd: command_name in ([match.lower() for match in cmd.matches] if self.ignore_case else cmd.matches), \
-                self._commands)
-        try:
-            matched: Command = next(matches)
-        except StopIteration as e:
+        matched: Command | None = self._match_index.get(command_name)
+        if matched is None:
             raise CommandNotFoundError(
-                f'Command {command_name} not found') from e
-
-        try:
-            other: Command = next(matches)
-        except StopIteration:
-            return matched
-        else:
-            raise RuntimeError(
-                f'{command_name} matched two commands -> {matched} and {other}')
+                f'Command {command_name} not found')
+        return matched
 
     def execute(self, line_or_entries: str | Iterable[str]) -> tuple[Command, Any]:
         '''Execute one command with given line or entries'''
 
         extractor: Callable[[str | Iterable[str]], tuple[list[str], dict[str, str]]] = \
-            deliminate_text_args if isinstance(line_or_entries, str) else extract_positionals_and_kwargs
+            parse_line if isinstance(line_or_entries, str) else extract_positionals_and_kwargs
         args, kwargs = extractor(line_or_entries)
 
         if len(args) == 0:
             raise EmptyEntryError('Nothing was entered')
 
-        command_name: str = args[0]
+        command_name: str = sys.intern(self._case_fold(args[0]))
         args: list[str] = args[1:]
 
-        if self.ignore_case:
-            command_name = command_name.lower()
-
         matched = self.match_command(command_name)
 
         self._invoking = matched
         self._invoking_func = matched.function
-        matched.function.__invoker__ = self
+        _INVOKER_REGISTRY[matched.function] = ref(self)
 
-        parsed_args, parsed_kwargs = parse_arguments(
-            args, \
-            kwargs, \
-            matched.positional_types(), \
-            matched.kwarg_types(), matched.has_var_args(), \
-            matched.has_var_kwargs(), self.arg_parsers)
+        parsed_args, parsed_kwargs = matched.parse_arguments(
+            args, kwargs, self.arg_parsers)
 
-        results = matched, matched.function(*parsed_args, **parsed_kwargs)
+        call: Callable = matched.cached_call() or matched.function
+        results = matched, call(*parsed_args, **parsed_kwargs)
 
-        matched.function.__invoker__ = None
+        _INVOKER_REGISTRY.pop(matched.function, None)
         self._invoking_func = None
         self._invoking = None
 
         return results
 
     def run(self, exception_handler: Optional[Callable[[Exception], None]] = None, return_value_handler: Optional[Callable[[Command, Any], None]] = None) -> None:
-        '''Loop execute() until stop() is called'''
+        '''Loop execute() until stop() is called or piped input runs out'''
 
-        def with_except():
+        def with_except(line: str):
             try:
-                results: tuple[Command, Any] = self.execute(
-                    input(f'{self.title}{self.entry_marker}'))
+                results: tuple[Command, Any] = self.execute(line)
             except Exception as e:
                 exception_handler(e)
                 if self._invoking_func:
-                    self._invoking_func.__invoker__ = None
+                    _INVOKER_REGISTRY.pop(self._invoking_func, None)
                 self._invoking_func = None
                 self._invoking = None
             else:
                 if return_value_handler is not None:
                     return_value_handler(*results)
 
-        def without_except():
+        def without_except(line: str):
             try:
-                results: tuple[Command, Any] = self.execute(
-                    input(f'{self.title}{self.entry_marker}'))
+                results: tuple[Command, Any] = self.execute(line)
             except CLIError as e:
                 if self._invoking_func:
-                    self._invoking_func.__invoker__ = None
+                    _INVOKER_REGISTRY.pop(self._invoking_func, None)
                 self._invoking_func = None
                 self._invoking = None
                 print(f'An error occured: {repr(e)}')
@@ -150,12 +154,20 @@ class CLI:
                 if return_value_handler is not None:
                     return_value_handler(*results)
 
-        executor: Callable[[]] = \
+        executor: Callable[[str]] = \
             without_except if exception_handler is None else with_except
 
         self._keep_running = True
-        while self._keep_running:
-            executor()
+        if sys.stdin.isatty():
+            while self._keep_running:
+                executor(input(f'{self.title}{self.entry_marker}'))
+        else:
+            # Piped/scripted input: skip the per-line prompt and read stdin directly
+            for line in sys.stdin:
+                if not self._keep_running:
+                    break
+                executor(line)
+            self._keep_running = False
 
     def invoking(self) -> Command | None:
         '''Get which command is getting invoked'''
@@ -167,7 +179,7 @@ class CLI:
         self._keep_running = False
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class Verb:
     '''All data relating to Verb-Noun pattern for commands'''
 
@@ -187,14 +199,14 @@ class Verb:
 def cli_of(func) -> list[CLI]:
     '''Get what CLIs `func` is part of'''
 
-    if not hasattr(func, CLI.CLI_ATTR):
+    refs = _CLI_REGISTRY.get(func)
+    if refs is None:
         return []
-    return func.__cli__
+    return _resolve_refs(refs)
 
 
 def invoker(func) -> CLI | None:
     '''Get what CLI invoked `func`. If none, was not invoked by CLI'''
 
-    if not hasattr(func, CLI.INVOKER_ATTR):
-        return None
-    return func.__invoker__
+    cli_ref = _INVOKER_REGISTRY.get(func)
+    return None if cli_ref is None else cli_ref()
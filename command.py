@@ -3,96 +3,154 @@
 '''
 
 from __future__ import annotations
+from sys import intern
+from functools import lru_cache
 from inspect import signature, Signature, Parameter
 from typing import Callable
-from dataclasses import dataclass, field
-from .parsing import from_type_annotation
+from dataclasses import dataclass, field, InitVar
+from weakref import WeakKeyDictionary, ref
+from .parsing import from_type_annotation, compile_parse_function
 
 
-@dataclass
+# Registry of what Commands a function is part of, weakly keyed so entries die with the
+# function; values hold weakrefs so they do not keep their own key alive
+_CMD_REGISTRY: WeakKeyDictionary[Callable, list[ref[Command]]] = WeakKeyDictionary()
+
+
+def _resolve_refs(refs: list[ref]) -> list:
+    '''Dereference a registry ref list, pruning entries that were collected'''
+
+    resolved = []
+    alive = []
+    for reference in refs:
+        target = reference()
+        if target is not None:
+            alive.append(reference)
+            resolved.append(target)
+    if len(alive) != len(refs):
+        refs[:] = alive
+    return resolved
+
+# Memoized signature() results, weakly keyed so entries die with the function
+_SIGNATURE_CACHE: WeakKeyDictionary[Callable, Signature] = WeakKeyDictionary()
+
+
+def _get_signature(function: Callable) -> Signature:
+    '''Get `signature(function)`, memoized per function object'''
+
+    try:
+        cached = _SIGNATURE_CACHE.get(function)
+        if cached is None:
+            cached = _SIGNATURE_CACHE[function] = signature(function)
+        return cached
+    except TypeError:  # Not weak-referenceable, skip caching
+        return signature(function)
+
+
+@dataclass(slots=True, weakref_slot=True)
 class Command:
     '''All data relating to  a command'''
 
-    # Attribute applied to function to list all commands of the function
-    CMD_ATTR = '__cmd__'
-
     function:   Callable
     matches:    tuple[str]              = field(default_factory=lambda: None)
-    detail:     str                     = field(default_factory='')
+    detail:     InitVar[str | None]     = None
     verb:       Verb | None             = field(default_factory=lambda: None)
     options:    dict[str, Any] | None   = field(default_factory=lambda: {})
 
-    def __post_init__(self) -> None:
-        self._signature: Signature = signature(self.function)
-
-        self._positionals: list[Parameter] = list(filter(
-            lambda param: param.default is param.empty and param.kind == param.POSITIONAL_OR_KEYWORD, \
-                self._signature.parameters.values()))
-        self._keywords: list[Parameter] = list(filter(
-            lambda param: param.default is not param.empty, \
-                self._signature.parameters.values()))
+    _detail:            str | None          = field(init=False, repr=False, compare=False, default=None)
+    _matches_lower:     tuple[str]          = field(init=False, repr=False, compare=False)
+    _signature:         Signature           = field(init=False, repr=False, compare=False)
+    _positionals:       list[Parameter]     = field(init=False, repr=False, compare=False)
+    _keywords:          list[Parameter]     = field(init=False, repr=False, compare=False)
+    _positional_types:  list[type]          = field(init=False, repr=False, compare=False)
+    _kwarg_type_map:    dict[str, type]     = field(init=False, repr=False, compare=False)
+    _has_var_args:      bool                = field(init=False, repr=False, compare=False)
+    _has_var_kwargs:    bool                = field(init=False, repr=False, compare=False)
+    _cached_call:       Callable | None     = field(init=False, repr=False, compare=False, default=None)
+    _parse:             Callable            = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self, detail: str | None) -> None:
+        self._detail = detail if detail else None
+        self._signature: Signature = _get_signature(self.function)
+
+        self._positionals: list[Parameter] = []
+        self._keywords: list[Parameter] = []
+        self._positional_types: list[type] = []
+        self._kwarg_type_map: dict[str, type] = {}
+        self._has_var_args: bool = False
+        self._has_var_kwargs: bool = False
+
+        for param in self._signature.parameters.values():
+            assert param.kind != param.KEYWORD_ONLY, \
+                'KEYWORD_ONLY kinds parameters are not supported by parsing.parse_arguments'
+            if param.kind == param.VAR_POSITIONAL:
+                self._has_var_args = True
+            elif param.kind == param.VAR_KEYWORD:
+                self._has_var_kwargs = True
+            elif param.default is param.empty:
+                if param.kind == param.POSITIONAL_OR_KEYWORD:
+                    self._positionals.append(param)
+                    self._positional_types.append(
+                        str if param.annotation is None else from_type_annotation(param.annotation))
+            else:
+                self._keywords.append(param)
+                self._kwarg_type_map[param.name] = \
+                    str if param.annotation is None else from_type_annotation(param.annotation)
+        self._parse = compile_parse_function(
+            self._positional_types, self._kwarg_type_map,
+            self._has_var_args, self._has_var_kwargs)
 
-        assert all(param.kind != param.KEYWORD_ONLY for param in self._signature.parameters.values()), \
-            'KEYWORD_ONLY kinds parameters are not supported by parsing.parse_arguments'
-
-        self._positional_types: list[type] = [str if param.annotation is None else from_type_annotation(param.annotation) \
-                                              for param in self._positionals]
-        self._kwarg_types: list[tuple[str, type]] = [(param.name, str if param.annotation is None else from_type_annotation(param.annotation)) \
-                                                     for param in self._keywords]
         self.options = {} if self.options is None else self.options
 
-        if not hasattr(self.function, Command.CMD_ATTR):
-            setattr(self.function, Command.CMD_ATTR, [self])
-        else:
-            self.function.__cmd__.append(self)
+        if self.options.get('memoize'):
+            self._cached_call = lru_cache(
+                maxsize=self.options.get('memoize_size', 128))(self.function)
+
+        _CMD_REGISTRY.setdefault(self.function, []).append(ref(self))
 
         if self.matches is None or not self.matches:
             self.matches = ()
             self.generate_matches()
         elif self.verb is not None and not self.verb.keep_original_matches:
             self.generate_matches()
-
-        if self.detail is None or not self.detail:
-            self.generate_detail()
+        else:
+            self._finalize_matches()
 
     def generate_detail(self) -> None:
         '''Automatically generate `detail` from function signature'''
 
-        self.detail = ''
-
-        for index, match in enumerate(self.matches):
-            self.detail += match
-            if index != len(self.matches) - 1:
-                self.detail += ', '
+        parts: list[str] = [', '.join(self.matches)]
 
         if not self._positionals and not self._keywords:
+            self._detail = parts[0]
             return
 
-        self.detail += ': '
+        parts.append(': ')
 
-        for index, param in enumerate(self._positionals):
-            self.detail += f'<{param.name}: {"str" if param.annotation is None else from_type_annotation(param.annotation).__name__}>'
-            if index != len(self._positionals) - 1:
-                self.detail += ' '
+        parts.append(' '.join(
+            f'<{param.name}: {arg_type.__name__}>'
+            for param, arg_type in zip(self._positionals, self._positional_types)))
 
-        if len(self._keywords) != 0 and self.detail[-1] != ' ':
-            self.detail += ' '
+        if self._keywords and self._positionals:
+            parts.append(' ')
 
-        for index, param in enumerate(self._keywords):
-            self.detail += f'<{param.name}? = {param.default}: {"str" if param.annotation is None else from_type_annotation(param.annotation).__name__}>'
-            if index != len(self._keywords) - 1:
-                self.detail += ' '
+        parts.append(' '.join(
+            f'<{param.name}? = {param.default}: {arg_type.__name__}>'
+            for param, arg_type in zip(self._keywords, self._kwarg_type_map.values())))
 
         if self.has_var_args():
-            self.detail += ' <*args>'
+            parts.append(' <*args>')
         if self.has_var_kwargs():
-            self.detail += ' <**kwargs>'
+            parts.append(' <**kwargs>')
+
+        self._detail = ''.join(parts)
 
     def generate_matches(self) -> None:
         '''Automatically generate matches based on function name and `verb` if not None'''
 
         if self.verb is None:
             self.matches = tuple([self.function.__name__])
+            self._finalize_matches()
             return
 
         if not self.verb.keep_original_matches:
@@ -105,34 +163,73 @@ class Command:
                 verb_match = verb_match[1:]
             verb_match = f'{self.verb.verb}{self.verb.verb_noun_delimiter}{verb_match}'
         self.matches = tuple([verb_match]) + self.matches
+        self._finalize_matches()
+
+    def _finalize_matches(self) -> None:
+        '''Intern the finalized matches so index lookups can pointer-compare, and refresh their lowercase forms'''
+
+        self.matches = tuple(intern(match) for match in self.matches)
+        self._matches_lower = tuple(intern(match.lower()) for match in self.matches)
+
+    def matches_lower(self) -> tuple[str]:
+        '''`matches` lowercased, precomputed for case-insensitive lookup'''
+
+        return self._matches_lower
 
     def has_var_kwargs(self) -> bool:
         '''Function has `**kwargs`'''
 
-        return any(param.kind == Parameter.VAR_KEYWORD \
-                   for param in self._signature.parameters.values())
+        return self._has_var_kwargs
 
     def has_var_args(self) -> bool:
         '''Function has *args'''
 
-        return any(param.kind == Parameter.VAR_POSITIONAL \
-                   for param in self._signature.parameters.values())
+        return self._has_var_args
 
     def positional_types(self) -> list[type]:
         '''Positional types'''
 
         return self._positional_types
 
-    def kwarg_types(self) -> list[tuple[str, type]]:
-        '''Keyword types'''
+    def kwarg_type_map(self) -> dict[str, type]:
+        '''Keyword name to type map'''
+
+        return self._kwarg_type_map
+
+    def parse_arguments(self, args: list[str], kwargs: dict[str, str], parsers: Optional[dict[type, Callable]] = None) -> tuple[list[Any], dict[str, Any]]:
+        '''Parse entered args and kwargs with the parser compiled for this signature'''
+
+        return self._parse(args, kwargs, {} if parsers is None else parsers)
 
-        return self._kwarg_types
+    def cached_call(self) -> Callable | None:
+        '''
+            lru_cache-wrapped `function`, or None unless opted in with
+            options={'memoize': True} ('memoize_size' overrides the default 128).
+            Only for pure functions taking hashable arguments; the cache is
+            never invalidated on its own
+        '''
+
+        return self._cached_call
+
+
+def _get_detail(self: Command) -> str:
+    if self._detail is None:
+        self.generate_detail()
+    return self._detail
+
+
+def _set_detail(self: Command, detail: str | None) -> None:
+    self._detail = detail if detail else None
+
+
+# `detail` is an InitVar so it can be generated lazily on first access;
+# the property is bound after the class body so it does not shadow the
+# dataclass field declaration
+Command.detail = property(_get_detail, _set_detail, doc=Command.generate_detail.__doc__)
 
 
 def cmd(cli: CLI, func: Callable) -> Command | None:
-    if not hasattr(func, Command.CMD_ATTR):
-        return None
-    for cmd in func.__cmd__:
+    for cmd in cmds(func) or ():
         if cmd in cli.commands():
             return cmd
     return None
@@ -141,6 +238,7 @@ def cmd(cli: CLI, func: Callable) -> Command | None:
 def cmds(func: Callable) -> list[Command] | None:
     '''Get all commands `func` is a part of'''
 
-    if not hasattr(func, Command.CMD_ATTR):
+    refs = _CMD_REGISTRY.get(func)
+    if refs is None:
         return None
-    return func.__cmd__
+    return _resolve_refs(refs)
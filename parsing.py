@@ -4,15 +4,14 @@
 
 import builtins
 import codecs
+import re
+from functools import lru_cache
 from typing import Callable, Any, Optional, get_args
-from itertools import zip_longest
 from collections.abc import Iterable
 from .errors import ArgumentTypeError, TooManyArgumentsError, NotEnoughPositionalArgumentsError, UnescapedSequenceError, NotAKeywordError, KeywordAlreadyGivenError
 
 
-def from_type_annotation(annotation: str) -> type | None:
-    '''Get type from type annotation "str" -> str, str -> str'''
-
+def _from_type_annotation(annotation: str) -> type | None:
     args = get_args(annotation)
     if args:
         annotation = args[0]
@@ -30,40 +29,79 @@ def from_type_annotation(annotation: str) -> type | None:
         return t if isinstance(t, type) else None
 
 
+_from_type_annotation_cached = lru_cache(maxsize=None)(_from_type_annotation)
+
+
+def from_type_annotation(annotation: str) -> type | None:
+    '''Get type from type annotation "str" -> str, str -> str'''
+
+    try:
+        return _from_type_annotation_cached(annotation)
+    except TypeError:  # Unhashable typing constructs cannot be cache keys
+        return _from_type_annotation(annotation)
+
+
+@lru_cache(maxsize=None)
+def _compile_segment_pattern(string_escape: str, do_not_escape_char: str) -> re.Pattern:
+    '''Compile the segment regex: one group per quote char, one for unquoted runs, one for whitespace'''
+
+    escape = re.escape(do_not_escape_char)
+    alternatives = [
+        f'{re.escape(quote)}((?:{escape}.|[^{re.escape(quote)}{escape}])*){re.escape(quote)}'
+        for quote in string_escape]
+    alternatives.append(f'([^\\s{re.escape(string_escape)}]+)')
+    alternatives.append(r'(\s+)')
+    return re.compile('|'.join(alternatives), re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def _compile_unescape_pattern(do_not_escape_char: str) -> re.Pattern:
+    '''Compile the pattern that strips `do_not_escape_char` from escaped sequences'''
+
+    return re.compile(f'{re.escape(do_not_escape_char)}(.)', re.DOTALL)
+
+
 def split_outside_of(text: str, string_escape='\'"', do_not_escape_char: str = '\\') -> list[str]:
     '''Split words except sentences identified by "" or ''. Use \' or \" to insert it into sentence'''
 
     text = text.strip()
-    split: list[str] = ['']
-
-    do_not_escape = False
-    esacpe_char = None
-    for i, c in enumerate(text):
-        if c in string_escape:
-            if esacpe_char is None:
-                esacpe_char = c
-            elif do_not_escape:
-                split[-1] += c
-                do_not_escape = False
-            elif esacpe_char == c:
-                esacpe_char = None
-            continue
+    if not text:
+        return []
 
-        if esacpe_char is None and c == ' ':
-            if split[-1] != '':  # Add next split if last c wasn't also a whitespace
-                split.append('')
-            continue
-        elif esacpe_char is not None and c == do_not_escape_char and not do_not_escape:
-            do_not_escape = True
+    pattern: re.Pattern = _compile_segment_pattern(string_escape, do_not_escape_char)
+    unescape: re.Pattern = _compile_unescape_pattern(do_not_escape_char)
+    n_quotes: int = len(string_escape)
+    whitespace_group: int = n_quotes + 2
+
+    split: list[str] = []
+    parts: list[str] = []  # Adjacent quoted/unquoted segments of the current token
+    pos: int = 0
+    end: int = len(text)
+    # Bound method hoisted out of the loop for long multi-token lines
+    match_at = pattern.match
+    while pos < end:
+        match = match_at(text, pos)
+        if match is None:  # A quote char with no closing partner
+            raise UnescapedSequenceError(
+                f'Escaped with {text[pos]} but was not closed')
+        pos = match.end()
+        group: int = match.lastindex
+        if group == whitespace_group:  # Token boundary
+            if parts:
+                token = ''.join(parts)
+                parts.clear()
+                if token:
+                    split.append(token)
             continue
-        do_not_escape = False
-        split[-1] += c
-
-    if esacpe_char is not None:
-        raise UnescapedSequenceError(
-            f'Escaped with {esacpe_char} but was not closed')
-    if len(split) == 1 and not split[0]:
-        return []
+        segment: str = match.group(group)
+        if group <= n_quotes and do_not_escape_char in segment:
+            segment = unescape.sub(r'\1', segment)
+        parts.append(segment)
+
+    if parts:
+        token = ''.join(parts)
+        if token:
+            split.append(token)
     return split
 
 
@@ -72,6 +110,7 @@ def extract_positionals_and_kwargs(entries: Iterable[str], equality_specifier='=
 
     positionals: list[str] = []
     kwargs: dict[str, str] = {}
+    escape_set: frozenset[str] = frozenset(string_escape)
     escape_char: str | None = None
     keyword: str | None = None
     next_is_value: bool = False
@@ -97,21 +136,9 @@ def extract_positionals_and_kwargs(entries: Iterable[str], equality_specifier='=
                 # If arg is empty, its just a whitespace
                 positionals[-1] += (arg if arg else '') + ' '
             continue
-        # Check each char and if escaped
-        escaped: tuple[tuple[str, bool]] | bool = ((c, arg.startswith(c))
-                                                   for c in string_escape)
-
-        for c, starts in escaped:
-            if not starts:
-                continue
-            escape_char = c
-            escaped = True
-            break
-        else:
-            escaped = False
-        # `escape` now tells if this argument escapes
-
-        if escaped:
+        first: str = arg[:1]
+        if first in escape_set:  # This argument starts an escape
+            escape_char = first
             if arg == escape_char:
                 positionals.append(' ')
             else:
@@ -133,18 +160,18 @@ def extract_positionals_and_kwargs(entries: Iterable[str], equality_specifier='=
                 next_is_value = True
                 continue
 
-        if arg.endswith(equality_specifier):
+        head, eq_found, tail = arg.rpartition(equality_specifier)
+        if eq_found and not tail:  # Equality specifier is at the very end
             if index != len(positionals) - 1:  # Equality specifier is not very last
-                keyword = arg[:-1*len(equality_specifier)]
+                keyword = head
                 next_is_value = True
                 continue
 
-        if equality_specifier in arg:
-            # If it starts, assume its a positional since no keyword is given
-            if not arg.startswith(equality_specifier):
-                center = arg.index(equality_specifier)
-                kwargs[arg[:center]] = arg[center + len(equality_specifier):]
-                continue
+        # If it starts, assume its a positional since no keyword is given
+        head, eq_found, tail = arg.partition(equality_specifier)
+        if eq_found and head:
+            kwargs[head] = tail
+            continue
 
         positionals.append(arg)
 
@@ -157,19 +184,118 @@ def extract_positionals_and_kwargs(entries: Iterable[str], equality_specifier='=
     return positionals, kwargs
 
 
+def parse_line(line: str, equality_specifier='=', string_escape='\'"', do_not_escape_char: str = '\\') -> tuple[list[str], dict[str, str]]:
+    '''
+        Extract positionals and keywords from `line` in one pass, without the
+        intermediate token list of split_outside_of + extract_positionals_and_kwargs.
+        Quoted tokens are taken literally and never re-scanned for `equality_specifier`
+    '''
+
+    positionals: list[str] = []
+    kwargs: dict[str, str] = {}
+
+    text = line.strip()
+    if not text:
+        return positionals, kwargs
+
+    pattern: re.Pattern = _compile_segment_pattern(string_escape, do_not_escape_char)
+    unescape: re.Pattern = _compile_unescape_pattern(do_not_escape_char)
+    n_quotes: int = len(string_escape)
+    whitespace_group: int = n_quotes + 2
+
+    keyword: str | None = None
+    next_is_value: bool = False
+    parts: list[str] = []  # Adjacent quoted/unquoted segments of the current token
+    quoted_only: bool = True
+    pos: int = 0
+    end: int = len(text)
+    match_at = pattern.match
+    while pos <= end:
+        if pos < end:
+            match = match_at(text, pos)
+            if match is None:  # A quote char with no closing partner
+                raise UnescapedSequenceError(
+                    f'Escaped with {text[pos]} but was not closed')
+            pos = match.end()
+            group: int = match.lastindex
+            if group != whitespace_group:
+                segment: str = match.group(group)
+                if group <= n_quotes:
+                    if do_not_escape_char in segment:
+                        segment = unescape.sub(r'\1', segment)
+                else:
+                    quoted_only = False
+                parts.append(segment)
+                continue
+        else:
+            pos += 1  # Final flush after the last segment
+
+        if not parts:
+            continue
+        token: str = ''.join(parts)
+        parts.clear()
+        token_quoted: bool = quoted_only
+        quoted_only = True
+        if not token:
+            continue
+
+        if next_is_value:
+            kwargs[keyword] = token
+            next_is_value = False
+            continue
+
+        if token_quoted:  # Entirely quoted, take literally
+            positionals.append(token)
+            continue
+
+        if token == equality_specifier and positionals:  # Whitespace on either side of kwarg
+            keyword = positionals.pop()
+            next_is_value = True
+            continue
+
+        head, eq_found, tail = token.rpartition(equality_specifier)
+        if eq_found and not tail:  # Equality specifier is at the very end
+            keyword = head
+            next_is_value = True
+            continue
+
+        # If it starts, assume its a positional since no keyword is given
+        head, eq_found, tail = token.partition(equality_specifier)
+        if eq_found and head:
+            kwargs[head] = tail
+            continue
+
+        positionals.append(token)
+
+    if next_is_value:
+        raise UnescapedSequenceError(
+            f'Keyword {keyword} was not given a value')
+    return positionals, kwargs
+
+
 def deliminate_text_args(line: str, equality_specifier='=', string_escape='\'"') -> tuple[list[str], dict[str, str]]:
     '''Extract positionals and keywords from the `line` given the `equality_specifier`'''
 
-    return extract_positionals_and_kwargs(split_outside_of(line), equality_specifier, string_escape)
+    return parse_line(line, equality_specifier, string_escape)
+
+
+def _parse_value(parser: Callable, arg: str, position: int, arg_type: type, keyword: Optional[str] = None) -> Any:
+    '''Parse one entered argument, raising ArgumentTypeError on failure'''
+
+    try:
+        return parser(arg)
+    except Exception as e:
+        raise ArgumentTypeError(
+            f'Could not parse {arg} in position {position} as {arg_type}{f" for {keyword}" if keyword is not None else ""}') from e
 
 
-def parse_arguments(args: list[str], kwargs: dict[str, str], positionals: list[type], keywords: list[dict[str, type]], var_args: bool, var_kwargs: bool, parsers: Optional[dict[type, Callable]] = None) -> tuple[list[Any], dict[str, Any]]:
+def parse_arguments(args: list[str], kwargs: dict[str, str], positionals: list[type], keywords: dict[str, type], var_args: bool, var_kwargs: bool, parsers: Optional[dict[type, Callable]] = None) -> tuple[list[Any], dict[str, Any]]:
     '''
         KEWORD_ONLY kind parameters are not supported
-        `args` (Entered): list[str] -> ['arg1', 'arg 2'...] 
+        `args` (Entered): list[str] -> ['arg1', 'arg 2'...]
         `kwargs` (Entered): dict[str, str] -> { 'kwarg1': 'val', 'kwarg2': 'val'... }
         `positionals` (Required arguments): list[type] -> [str, str, int...]
-        `keywords` (Optional arguments): list[dict[str, type]] -> [{'count': int, 'filename': str... }...]
+        `keywords` (Optional arguments): dict[str, type] -> { 'count': int, 'filename': str... }
         `var_args`: bool -> Has `(*)` ex. `func(*args)` all var args will be parsed as str
         `var_kwargs`: bool -> Has `(**)` ex. `func(**kwargs)` all var kwargs will be parsed as str
         `parsers`: Optional[dict[type, Callable]] -> A string to instance converter -> { my_type: str_to_my_type... }
@@ -177,6 +303,11 @@ def parse_arguments(args: list[str], kwargs: dict[str, str], positionals: list[t
     if parsers is None:
         parsers = {}
 
+    resolved_parsers: dict[type, Callable] = \
+        {arg_type: parsers.get(arg_type, arg_type)
+         for arg_type in set(positionals) | set(keywords.values()) | {str}}
+    keyword_items: list[tuple[str, type]] = list(keywords.items())
+
     if not var_args:
         total_defined_args_count = len(args) + len(kwargs)
         if len(args) > total_defined_args_count:
@@ -186,57 +317,45 @@ def parse_arguments(args: list[str], kwargs: dict[str, str], positionals: list[t
         raise TooManyArgumentsError(
             f'Supplied {len(args)} keywords but only {len(positionals)} is allowed')
 
-    parsed_postitionals: list[Any] = []
-    parsed_keywords: dict[str, Any] = {}
-
-    def parse_positionals_and_positional_keywords():
-        for entered_arg_pos, (arg, positional_type) in enumerate(zip_longest(args, positionals)):
-            parsed = None
-            past_positionals_to_keywords = positional_type is None and not var_args
-
-            if past_positionals_to_keywords:
-                # Calculate keyword positional position
-                keyword, arg_type = \
-                    keywords[entered_arg_pos - len(positionals)]
-
-                def appender(): parsed_keywords[keyword] = parsed
-            else:
-                if positional_type is not None:  # Still in defined positionals
-                    arg_type = positional_type
-                else:  # In var args
-                    arg_type = str
-
-                def appender(): parsed_postitionals.append(parsed)
-
-            parser = parsers[arg_type] if arg_type in parsers else arg_type
-            try:
-                parsed = parser(arg)
-            except Exception as e:
-                raise ArgumentTypeError(
-                    f'Could not parse {arg} in position {entered_arg_pos} as {arg_type}{f" for {keyword}" if past_positionals_to_keywords else ""}') from e
-            else:
-                appender()
+    n_args = len(args)
+    n_positionals = len(positionals)
 
-    def parse_only_keywords():
-        if not var_kwargs and len(parsed_keywords) == len(keywords):  # All done
-            return
+    # Sized up front, so parsing assigns by index instead of growing the list
+    total_positionals = max(n_positionals, n_args) if var_args else n_positionals
+    parsed_postitionals: list[Any] = [None] * total_positionals
+    parsed_keywords: dict[str, Any] = {}
 
+    # Defined positionals
+    for entered_arg_pos, positional_type in enumerate(positionals):
+        arg = args[entered_arg_pos] if entered_arg_pos < n_args else None
+        parsed_postitionals[entered_arg_pos] = _parse_value(
+            resolved_parsers[positional_type], arg, entered_arg_pos, positional_type)
+
+    # Remaining args are either var args or positionally-given keywords
+    if var_args:
+        str_parser = resolved_parsers[str]
+        for entered_arg_pos in range(n_positionals, n_args):
+            parsed_postitionals[entered_arg_pos] = _parse_value(
+                str_parser, args[entered_arg_pos], entered_arg_pos, str)
+    else:
+        for entered_arg_pos in range(n_positionals, n_args):
+            keyword, arg_type = keyword_items[entered_arg_pos - n_positionals]
+            parsed_keywords[keyword] = _parse_value(
+                resolved_parsers[arg_type], args[entered_arg_pos], entered_arg_pos, arg_type, keyword)
+
+    if var_kwargs or len(parsed_keywords) != len(keywords):  # Keywords left to parse
         for keyword, arg in kwargs.items():
             if keyword in parsed_keywords:
                 raise TooManyArgumentsError(
                     f'Keyword {keyword} was given twice either as a keyword or most probably, a positional')
 
-            try:
-                _, arg_type = \
-                    next(filter(lambda tup: tup[0] == keyword, keywords))
-                parser = parsers[arg_type] if arg_type in parsers else arg_type
-            except StopIteration as e:
-                if not var_args:
-                    raise TooManyArgumentsError(
-                        f'Keyword {keyword} is not a keyword argument') from e
-                else:
-                    arg_type = str
-                    parser = str
+            arg_type = keywords.get(keyword)
+            if arg_type is None:
+                if not var_kwargs:
+                    raise NotAKeywordError(
+                        f'Keyword {keyword} is not a keyword argument')
+                arg_type = str
+            parser = resolved_parsers[arg_type]
 
             try:
                 parsed = parser(arg)
@@ -246,12 +365,95 @@ def parse_arguments(args: list[str], kwargs: dict[str, str], positionals: list[t
             else:
                 parsed_keywords[keyword] = parsed
 
-    parse_positionals_and_positional_keywords()
-    parse_only_keywords()
-
     return parsed_postitionals, parsed_keywords
 
 
+def compile_parse_function(positionals: list[type], keywords: dict[str, type], var_args: bool, var_kwargs: bool) -> Callable[[list[str], dict[str, str], dict[type, Callable]], tuple[list[Any], dict[str, Any]]]:
+    '''
+        Generate `parse(args, kwargs, parsers)` specialized to one command signature.
+        Same semantics as parse_arguments for that signature, but with the generic
+        loops unrolled and the count checks baked in at definition time
+    '''
+
+    n_positionals = len(positionals)
+    n_keywords = len(keywords)
+
+    namespace: dict[str, Any] = {
+        '_parse_value': _parse_value,
+        'TooManyArgumentsError': TooManyArgumentsError,
+        'NotAKeywordError': NotAKeywordError,
+        'ArgumentTypeError': ArgumentTypeError,
+        '_kw_items': tuple(keywords.items()),
+        '_kw_map': dict(keywords),
+    }
+
+    # Types cannot be source literals, so each distinct one becomes a constant _t<index>
+    type_index: dict[type, int] = {}
+    for arg_type in [*positionals, *keywords.values(), str]:
+        if arg_type not in type_index:
+            index = len(type_index)
+            type_index[arg_type] = index
+            namespace[f'_t{index}'] = arg_type
+
+    lines: list[str] = [
+        'def _parse(args, kwargs, parsers):',
+        '    n_args = len(args)',
+    ]
+    if not var_kwargs:
+        lines += [
+            f'    if len(kwargs) > {n_keywords}:',
+            f"        raise TooManyArgumentsError(f'Supplied {{n_args}} keywords but only {n_positionals} is allowed')",
+        ]
+    for index in type_index.values():
+        lines.append(f'    _p{index} = parsers.get(_t{index}, _t{index})')
+
+    for position, arg_type in enumerate(positionals):
+        index = type_index[arg_type]
+        lines.append(
+            f'    a{position} = _parse_value(_p{index}, args[{position}] if {position} < n_args else None, {position}, _t{index})')
+    lines.append(
+        '    parsed_positionals = [' + ', '.join(f'a{position}' for position in range(n_positionals)) + ']')
+    lines.append('    parsed_keywords = {}')
+
+    str_index = type_index[str]
+    if var_args:
+        lines += [
+            f'    for position in range({n_positionals}, n_args):',
+            f'        parsed_positionals.append(_parse_value(_p{str_index}, args[position], position, _t{str_index}))',
+        ]
+    else:
+        lines += [
+            f'    for position in range({n_positionals}, n_args):',
+            f'        keyword, arg_type = _kw_items[position - {n_positionals}]',
+            '        parsed_keywords[keyword] = _parse_value(parsers.get(arg_type, arg_type), args[position], position, arg_type, keyword)',
+        ]
+
+    keyword_loop: list[str] = [
+        '    for keyword, arg in kwargs.items():',
+        '        if keyword in parsed_keywords:',
+        "            raise TooManyArgumentsError(f'Keyword {keyword} was given twice either as a keyword or most probably, a positional')",
+        '        arg_type = _kw_map.get(keyword)',
+        '        if arg_type is None:',
+        f'            arg_type = _t{str_index}' if var_kwargs else
+        "            raise NotAKeywordError(f'Keyword {keyword} is not a keyword argument')",
+        '        parser = parsers.get(arg_type, arg_type)',
+        '        try:',
+        '            parsed_keywords[keyword] = parser(arg)',
+        '        except Exception as e:',
+        "            raise ArgumentTypeError(f'Could not parse {arg} as {arg_type} for {keyword}') from e",
+    ]
+    if var_kwargs:
+        lines += keyword_loop
+    else:
+        lines.append(f'    if len(parsed_keywords) != {n_keywords}:  # Keywords left to parse')
+        lines += ['    ' + line for line in keyword_loop]
+
+    lines.append('    return parsed_positionals, parsed_keywords')
+
+    exec('\n'.join(lines), namespace)
+    return namespace['_parse']
+
+
 def process_escape_characters(string: str, custom_escape_encoding: Optional[str] = None) -> str:
     '''Process escape characters for what the user entered'''
 